@@ -1,19 +1,194 @@
 import asyncio
 import configparser
+import functools
+import inspect
 import os
 import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Optional
 
 import numpy as np
 import pandas as pd
 from caveclient import CAVEclient
-from slack_sdk import WebClient
-from slack_sdk.errors import SlackApiError
-from sqlalchemy import text
+import aiohttp
+from slack_sdk.web.async_client import AsyncWebClient
+from sqlalchemy import (
+    BigInteger,
+    Integer,
+    bindparam,
+    inspect as sqlalchemy_inspect,
+    text,
+)
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.engine.url import make_url
 
 __version__ = "0.5.0"
 
+# Slack rate limits chat.postMessage to roughly one message per second per channel
+SLACK_MESSAGE_INTERVAL = 1.0
+# Maximum number of supervoxel ids sent to chunkedgraph in one get_roots request
+GET_ROOTS_CHUNK_SIZE = 50000
+# Prepared statements cached per connection; each table uses a few statements per cycle,
+# so asyncpg's default of 100 would evict them on datastacks with many tables
+STATEMENT_CACHE_SIZE = 1024
+# Without tsm_system_rows, this many random ids per sampled row are drawn so that gaps
+# left by deleted annotations still fill the sample
+ID_SAMPLE_OVERSAMPLING = 2
+# Seconds the min/max id of a table are reused before they are queried again
+ID_BOUNDS_TTL = 300.0
+
+
+@dataclass(frozen=True)
+class CanarySettings:
+    """
+    Typed snapshot of the `[SETTINGS]` section of the Canary configuration.
+    """
+
+    database_uri: str
+    datastack_name: str
+    slack_api_token: str
+    slack_channel: str
+    check_interval: int
+    num_test_annotations: int
+    use_tsm_system_rows: bool = True
+    create_missing_extensions: bool = False
+    server_address: Optional[str] = None
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Parses and type-converts the settings once from a `configparser.ConfigParser`.
+        """
+        return cls(
+            database_uri=config.get("SETTINGS", "DATABASE_URI"),
+            datastack_name=config.get("SETTINGS", "DATASTACK_NAME"),
+            slack_api_token=config.get("SETTINGS", "SLACK_API_TOKEN"),
+            slack_channel=config.get("SETTINGS", "SLACK_CHANNEL"),
+            check_interval=config.getint("SETTINGS", "CHECK_INTERVAL"),
+            num_test_annotations=config.getint("SETTINGS", "NUM_TEST_ANNOTATIONS"),
+            use_tsm_system_rows=config.getboolean(
+                "SETTINGS", "USE_TSM_SYSTEM_ROWS", fallback=True
+            ),
+            create_missing_extensions=config.getboolean(
+                "SETTINGS", "CREATE_MISSING_EXTENSIONS", fallback=False
+            ),
+            server_address=config.get("SETTINGS", "SERVER_ADDRESS", fallback=None),
+        )
+
+
+@functools.lru_cache(maxsize=16)
+def _database_uri(default_uri: str, datastack_name: str, version: int):
+    """
+    Returns the URL of the materialized database of the specified version.
+
+    Any PostgreSQL driver is replaced by `asyncpg`, since a bare `postgresql://` URI would
+    load the synchronous psycopg2 dialect.
+    """
+    sql_base_uri = default_uri.rpartition("/")[0]
+    url = make_url(f"{sql_base_uri}/{datastack_name}__mat{version}")
+    if url.get_backend_name() == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+    return url
+
+
+@functools.lru_cache(maxsize=8)
+def _read_config(config_file: str, mtime: float):
+    """
+    Returns the contents of the config file, cached until its modification time changes.
+    """
+    with open(config_file, encoding="utf-8") as f:
+        return f.read()
+
+
+def _load_config(config_file: str):
+    """
+    Returns a new ConfigParser with the config file's settings; empty if there is no file.
+    """
+    config = configparser.ConfigParser()
+    try:
+        mtime = os.path.getmtime(config_file)
+    except OSError:
+        # a missing file is not cached, so it is picked up as soon as it is created
+        return config
+    config.read_string(_read_config(config_file, mtime), source=config_file)
+    return config
+
+
+@functools.lru_cache(maxsize=None)
+def _supervoxel_root_pairs(columns: tuple):
+    """
+    Returns the `(supervoxel_id, root_id)` column name pairs present in `columns`.
+
+    Table schemas do not change between cycles, so the pairs are computed once per
+    distinct tuple of column names.
+    """
+    column_set = set(columns)
+    pairs = []
+    for col in columns:
+        if col.endswith("_supervoxel_id"):
+            root_id_col = f"{col[: -len('_supervoxel_id')]}_root_id"
+            if root_id_col in column_set:
+                pairs.append((col, root_id_col))
+    return tuple(pairs)
+
+
+def _as_uint64(values):
+    """
+    Returns `values` as a contiguous `uint64` array, with nulls as `0`.
+
+    Mixing signed database ids with the `uint64` ids returned by chunkedgraph can promote
+    both sides to float64 on older NumPy, and object arrays are compared element by element.
+    """
+    values = np.asarray(values)
+    if values.dtype == object:
+        values = np.where(pd.isnull(values), 0, values)
+    return np.ascontiguousarray(values, dtype=np.uint64)
+
+
+def _rows_to_arrays(columns, rows):
+    """
+    Transposes sampled `rows` into one array per column.
+
+    Segmentation ids are stored as `uint64` from the start, so later comparisons never fall
+    back to object arrays.
+    """
+    values = list(zip(*rows)) or [()] * len(columns)
+    return {
+        column: np.array(value, dtype=np.int64) if column == "id" else _as_uint64(value)
+        for column, value in zip(columns, values)
+    }
+
+
+def _stack_supervoxel_ids(df, pairs):
+    """
+    Returns the supervoxel ids of all `pairs` in `df` concatenated in pair order.
+    """
+    return np.concatenate([_as_uint64(df[sv_col]) for sv_col, _ in pairs])
+
+
+def _start_task(coro):
+    """
+    Schedules `coro` as a task, starting it eagerly where supported (Python 3.12+).
+
+    Eager tasks that finish without blocking (cache hits) skip a scheduler round trip.
+    Only the Canary's own tasks are started eagerly, the caller's event loop is left as is.
+    """
+    if hasattr(asyncio, "eager_task_factory"):
+        return asyncio.Task(coro, loop=asyncio.get_running_loop(), eager_start=True)
+    return asyncio.ensure_future(coro)
+
+
+def _sample_supervoxel_ids(sample):
+    """
+    Returns the stacked supervoxel ids of `sample`, or `None` if there is nothing to check.
+    """
+    pairs = _supervoxel_root_pairs(tuple(sample))
+    if not len(sample["id"]) or not pairs:
+        return None
+    return _stack_supervoxel_ids(sample, pairs)
+
 
 class Canary:
     def __init__(self, client=None, config=None, slack_client=None):
@@ -23,29 +198,25 @@ class Canary:
         Parameters:
             client (CAVEclient, optional): The CAVEclient instance to use. Defaults to `None`.
             config (configparser.ConfigParser, optional): The configuration to use. Defaults to `None`.
-            slack_client (slack_sdk.WebClient, optional): The Slack client to use. Defaults to `None`.
+            slack_client (slack_sdk.web.async_client.AsyncWebClient, optional): The Slack client
+                to use; a synchronous `slack_sdk.WebClient` is also accepted. Defaults to `None`.
         """
         if not config:
-            self.config = configparser.ConfigParser()
             config_file = os.environ.get("CAVECANARY_CONFIG_FILE", "config.cfg")
-            self.config.read(config_file)
+            self.config = _load_config(config_file)
         else:
             self.config = config
-        self.default_uri = self.config.get("SETTINGS", "DATABASE_URI")
-        self.datastack_name = self.config.get("SETTINGS", "DATASTACK_NAME")
-        self.server_address = self.config.get(
-            "SETTINGS", "SERVER_ADDRESS", fallback=None
-        )
-        self.slack_api_token = self.config.get("SETTINGS", "SLACK_API_TOKEN")
-        self.slack_channel = self.config.get("SETTINGS", "SLACK_CHANNEL")
-        self.use_tsm_system_rows_extension = self.config.get(
-            "SETTINGS", "USE_TSM_SYSTEM_ROWS", fallback=False
-        )
-
-        self.check_interval = self.config.getint("SETTINGS", "CHECK_INTERVAL")
-        self.num_test_annotations = self.config.getint(
-            "SETTINGS", "NUM_TEST_ANNOTATIONS"
-        )
+        self.settings = CanarySettings.from_config(self.config)
+        self.default_uri = self.settings.database_uri
+        self.datastack_name = self.settings.datastack_name
+        self.server_address = self.settings.server_address
+        self.slack_api_token = self.settings.slack_api_token
+        self.slack_channel = self.settings.slack_channel
+        # may be turned off by run() when the extension cannot be created
+        self.use_tsm_system_rows_extension = self.settings.use_tsm_system_rows
+
+        self.check_interval = self.settings.check_interval
+        self.num_test_annotations = self.settings.num_test_annotations
         if client is None:
             self.client = CAVEclient(
                 self.datastack_name,
@@ -55,10 +226,24 @@ class Canary:
             self.client = client
 
         self.database_uri = self._create_latest_version_db_uri()
+        self._async_engine = None
+        self._async_engine_uri = None
+        self._id_bounds = {}
+        self._sample_columns = {}
+        self._sample_statements = {}
+        self._table_metadata = {}
+        self._table_metadata_fetches = {}
+        self._table_metadata_version = None
+        self._slack_queue = None
+        self._slack_worker = None
+        self._slack_session = None
+        self._slack_posts = set()
 
         self.datastack_info = self.client.info.get_datastack_info(self.datastack_name)
         if slack_client is None:
-            self.slack_client = WebClient(token=self.slack_api_token)
+            # the default retry handler reconnects when a pooled keep-alive connection has
+            # gone stale
+            self.slack_client = AsyncWebClient(token=self.slack_api_token)
         else:
             self.slack_client = slack_client
         self.segmentation_source = self.datastack_info["segmentation_source"].split(
@@ -69,97 +254,566 @@ class Canary:
         self, extension_name: str = "tsm_system_rows"
     ):
         # check if postgresql extension is installed on database
-        async_engine = create_async_engine(self.database_uri)
-        async with async_engine.begin() as conn:
-            get_extension_query = (
-                f"SELECT * FROM pg_extension WHERE extname = '{extension_name}';"
-            )
-            result = await conn.execute(text(get_extension_query))
-            extension_results = result.fetchone()
-            logging.debug(extension_results)
-            if not extension_results:
-                try:
-                    result = await conn.execute(
-                        text(f"CREATE EXTENSION {extension_name};")
-                    )
-                    logging.debug(result.fetchone())
-                    logging.debug(f"Created extension {extension_name}")
-                except Exception as e:
-                    logging.error(f"Failed to create extension tsm_system_rows: {e}")
-                    return False
-            else:
-                logging.debug(f"Extension {extension_name} already exists")
-        await async_engine.dispose()
+        async_engine = await self._get_engine()
+        try:
+            async with async_engine.connect() as conn:
+                result = await conn.execute(
+                    text("SELECT 1 FROM pg_extension WHERE extname = :extension_name"),
+                    {"extension_name": extension_name},
+                )
+                extension_results = result.first()
+        except Exception as e:
+            logging.warning(f"Could not check for extension {extension_name}: {e}")
+            return False
+        if extension_results:
+            logging.debug(f"Extension {extension_name} already exists")
+            return True
+        if not self.settings.create_missing_extensions:
+            # read-only replicas and roles without CREATE privilege cannot install it
+            logging.info(f"Extension {extension_name} is not installed")
+            return False
+        quoted_extension_name = async_engine.dialect.identifier_preparer.quote(
+            extension_name
+        )
+        try:
+            async with async_engine.begin() as conn:
+                await conn.execute(text(f"CREATE EXTENSION {quoted_extension_name}"))
+            logging.debug(f"Created extension {extension_name}")
+        except Exception as e:
+            logging.error(f"Failed to create extension {extension_name}: {e}")
+            return False
         return True
 
+    async def _get_engine(self, pool_size: int = 16):
+        """
+        Returns the pooled async engine for the current database URI, creating it on first use.
+
+        The engine is kept for the lifetime of the instance so connections are reused across
+        check cycles; it is only rebuilt (and the old pool disposed) when `database_uri` changes.
+
+        Parameters:
+            pool_size (int, optional): The number of pooled connections. Defaults to `16`.
+
+        Returns:
+            sqlalchemy.ext.asyncio.engine.AsyncEngine: The shared async engine.
+        """
+        if self._async_engine is not None:
+            if self._async_engine_uri == self.database_uri:
+                return self._async_engine
+            await self._async_engine.dispose()
+        # id bounds, table columns and sample statements are cached per database
+        self._id_bounds = {}
+        self._sample_columns = {}
+        self._sample_statements = {}
+        engine_kwargs = {}
+        if make_url(self.database_uri).get_driver_name() == "asyncpg":
+            engine_kwargs["connect_args"] = {
+                "prepared_statement_cache_size": STATEMENT_CACHE_SIZE,
+                "statement_cache_size": STATEMENT_CACHE_SIZE,
+                # the sample queries are tiny, JIT compilation only adds latency
+                "server_settings": {"application_name": "cavecanary", "jit": "off"},
+            }
+        self._async_engine = create_async_engine(
+            self.database_uri,
+            pool_size=pool_size,
+            max_overflow=0,
+            pool_pre_ping=True,
+            pool_recycle=1800,
+            **engine_kwargs,
+        )
+        self._async_engine_uri = self.database_uri
+        return self._async_engine
+
+    async def close(self):
+        """
+        Disposes the shared async engine and its connection pool.
+        """
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
+            self._async_engine = None
+            self._async_engine_uri = None
+
     def _create_latest_version_db_uri(self):
-        latest_version = max(self.client.materialize.get_versions())
+        latest_version = self.client.materialize.most_recent_version()
         self.client.materialize.version = (
             latest_version  # make client set to latest version on error
         )
-        sql_base_uri = self.default_uri.rpartition("/")[0]
-        return make_url(f"{sql_base_uri}/{self.datastack_name}__mat{latest_version}")
+        return _database_uri(self.default_uri, self.datastack_name, int(latest_version))
+
+    async def _update_latest_version(self):
+        """
+        Points the Canary at the most recent materialization version, if it changed.
+
+        The new version is only adopted, by the client and the Canary, once its tables and
+        metadata have been fetched, so a failed refresh leaves both on the previous version.
+
+        Returns:
+            tuple: The annotation table names and the version metadata of the new version;
+                `None` if the version did not change.
+        """
+        latest_version = int(
+            await asyncio.to_thread(self.client.materialize.most_recent_version)
+        )
+        database_uri = _database_uri(
+            self.default_uri, self.datastack_name, latest_version
+        )
+        if database_uri == self.database_uri:
+            return None
+        logging.info(f"Found new materialization database {database_uri.database}")
+        return await self._prepare_version(latest_version, database_uri)
+
+    async def _prepare_version(self, version=None, database_uri=None):
+        """
+        Fetches the tables of a materialization version and prepares its database.
+
+        Parameters:
+            version (int, optional): The materialization version to switch to once its tables
+                are fetched. Defaults to the client's current version.
+            database_uri (sqlalchemy.engine.URL, optional): The database of `version`.
+                Defaults to the current database.
+
+        Returns:
+            tuple: The annotation table names and the version metadata.
+        """
+        # CAVEclient requests are blocking, fetch the metadata in worker threads
+        annotation_tables, version_info, tables_metadata = await asyncio.gather(
+            asyncio.to_thread(self.client.materialize.get_tables, version=version),
+            asyncio.to_thread(
+                self.client.materialize.get_version_metadata, version=version
+            ),
+            asyncio.to_thread(
+                self.client.materialize.get_tables_metadata, version=version
+            ),
+            return_exceptions=True,
+        )
+        for result in (annotation_tables, version_info):
+            if isinstance(result, Exception):
+                raise result
+        if version is not None:
+            self.client.materialize.version = version
+        if database_uri is not None:
+            self.database_uri = database_uri
+        if isinstance(tables_metadata, Exception):
+            # table metadata is then fetched table by table on first use
+            logging.warning(f"Could not fetch table metadata: {tables_metadata}")
+        else:
+            version = self._metadata_version(version_info)
+            self._table_metadata = {
+                (version, table_info["table_name"]): table_info
+                for table_info in tables_metadata
+            }
+            self._table_metadata_version = version
+
+        # create the shared engine with its pool size before anything else uses it
+        await self._get_engine(pool_size=min(len(annotation_tables), 16) or 1)
+        if self.settings.use_tsm_system_rows:
+            # check if postgresql extension is installed on database, otherwise fall
+            # back to id range sampling
+            self.use_tsm_system_rows_extension = (
+                await self.check_if_extension_is_installed(
+                    extension_name="tsm_system_rows"
+                )
+            )
+        return annotation_tables, version_info
 
     async def run(self, iterations=None, use_tsm_system_rows_extension=False):
         """
         Runs the Canary.
 
+        Every check cycle runs on the calling event loop, so the database pool, the Slack
+        worker and the cached table state are reused for the lifetime of the run.
+
         Parameters:
             iterations (int, optional): The number of iterations to run. Defaults to `None`.
         """
         iteration_count = 0
-        background_tasks = []
-        try:
-            loop = asyncio.get_running_loop()
-        except RuntimeError:
-            loop = None
-
-        if self.use_tsm_system_rows_extension:
-            # check if postgresql extension is installed on database
-            await self.check_if_extension_is_installed(extension_name="tsm_system_rows")
 
-        annotation_tables = self.client.materialize.get_tables()
-        version_info = self.client.materialize.get_version_metadata()
-
-        while True:
-            if iterations is not None and iteration_count >= iterations:
-                break
-            # check if event loop is running and add as task else run with eventloop
-            if loop and loop.is_running():
-                for table_name in annotation_tables:
-                    task = loop.create_task(
-                        self.check_random_annotations(table_name, version_info)
-                    )
-                    background_tasks.append(task)
+        self._start_slack_worker()
+        try:
+            annotation_tables, version_info = await self._prepare_version()
+            while True:
+                if iterations is not None and iteration_count >= iterations:
+                    break
+                if iteration_count:
+                    # long running Canaries follow new materialization versions
+                    try:
+                        new_version = await self._update_latest_version()
+                    except Exception as error:
+                        logging.error(
+                            f"Error refreshing the materialization version: {error}. Checking the current version."
+                        )
+                    else:
+                        if new_version is not None:
+                            annotation_tables, version_info = new_version
                 try:
-                    await asyncio.gather(*background_tasks)
+                    async_engine = await self._get_engine()
+                    await self.check_annotation_tables(
+                        annotation_tables, version_info, async_engine
+                    )
                 except Exception as error:
                     logging.error(f"Error: {error}. Retrying task in next iteration.")
 
-            background_tasks = []
+                await asyncio.sleep(self.check_interval)
+
+                iteration_count += 1
+        finally:
+            await self._stop_slack_worker()
+            # pooled connections are bound to this event loop
+            await self.close()
 
-            await asyncio.sleep(self.check_interval)
+    async def check_annotation_tables(
+        self, annotation_tables: list, version_info: dict, async_engine=None
+    ):
+        """
+        Samples every table concurrently and checks the sampled root IDs in batches.
 
-            iteration_count += 1
+        Tables are checked as soon as their samples arrive, so mismatches are reported without
+        waiting for the slowest table. Samples that arrive while a root ID lookup is in flight
+        are batched into the next `lookup_root_ids` call, so a cycle costs a few chunked
+        `get_roots` requests rather than one per table.
 
-    async def check_random_annotations(self, table_name: str, version_info: dict):
+        Parameters:
+            annotation_tables (list): The names of the tables to check.
+            version_info (dict): The materialization version metadata.
+            async_engine (sqlalchemy.ext.asyncio.engine.AsyncEngine, optional): The engine to
+                query with. Defaults to the instance's shared engine.
+
+        Returns:
+            dict: Whether an error was found, keyed by the name of each checked table.
         """
-        Checks the specified random annotations.
+        if async_engine is None:
+            async_engine = await self._get_engine()
+        timestamp = version_info.get("time_stamp")
+        # bound the concurrent sample queries by the pool size so queued tables wait on
+        # the semaphore instead of timing out on a pool checkout
+        semaphore = asyncio.Semaphore(async_engine.pool.size())
+
+        async def sample_annotations(table_name):
+            async with semaphore:
+                return await self.sample_annotations(
+                    table_name, version_info, async_engine
+                )
+
+        pending = {
+            _start_task(sample_annotations(table_name)): table_name
+            for table_name in annotation_tables
+        }
+        samples = {}
+        check_task = None
+        results = {}
+        try:
+            while pending or samples or check_task:
+                if check_task is None and samples:
+                    check_task = _start_task(self._check_samples(samples, timestamp))
+                    samples = {}
+                done, _ = await asyncio.wait(
+                    [*pending, *([check_task] if check_task else [])],
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    if task is check_task:
+                        results.update(task.result())
+                        check_task = None
+                        continue
+                    table_name = pending.pop(task)
+                    if task.exception() is not None:
+                        logging.error(
+                            f"Error checking {table_name}: {task.exception()}. Retrying task in next iteration."
+                        )
+                        continue
+                    sample_table_name, sample = task.result()
+                    supervoxel_ids = _sample_supervoxel_ids(sample)
+                    if supervoxel_ids is not None:
+                        samples[sample_table_name] = (sample, supervoxel_ids)
+        finally:
+            # only left over when an unexpected error escaped the loop
+            for task in [*pending, *([check_task] if check_task else [])]:
+                task.cancel()
+        return results
+
+    async def _check_samples(self, samples: dict, timestamp):
+        """
+        Looks up the root IDs of all `samples` at once and checks each table's sample.
+        """
+        if timestamp is None:
+            version_info = await asyncio.to_thread(
+                self.client.materialize.get_version_metadata
+            )
+            timestamp = version_info["time_stamp"]
+        try:
+            root_ids = await self.lookup_root_ids(
+                np.concatenate([svs for _, svs in samples.values()]), timestamp
+            )
+        except Exception as e:
+            self.send_slack_notification(f"Error in get_roots: {e}")
+            logging.error(e)
+            return {}
+
+        offsets = np.cumsum([len(svs) for _, svs in samples.values()])[:-1]
+        return {
+            table_name: self._compare_root_ids(
+                sample, table_name, table_root_ids, timestamp
+            )
+            for (table_name, (sample, _)), table_root_ids in zip(
+                samples.items(), np.split(root_ids, offsets)
+            )
+        }
+
+    async def _check_sample(self, table_name: str, sample, timestamp):
+        """
+        Checks the sample of a single table, see `_check_samples`.
         """
-        async_engine = create_async_engine(self.database_uri)
-        table_info = self.client.materialize.get_table_metadata(table_name)
+        supervoxel_ids = _sample_supervoxel_ids(sample)
+        if supervoxel_ids is None:
+            return False
+        logging.debug(f"SAMPLED IDS: {sample['id'].min()}-{sample['id'].max()}")
+        results = await self._check_samples(
+            {table_name: (sample, supervoxel_ids)}, timestamp
+        )
+        return results.get(table_name, False)
+
+    async def lookup_root_ids(self, supervoxel_ids, timestamp):
+        """
+        Looks up the root IDs of the specified supervoxels.
+
+        Supervoxel `0` (unlabeled) always maps to root `0` and is not sent to chunkedgraph,
+        and every other supervoxel is looked up once no matter how often it appears.
+
+        Parameters:
+            supervoxel_ids (numpy.ndarray): The supervoxel ids to look up.
+            timestamp (datetime.datetime): The lookup timestamp.
+
+        Returns:
+            numpy.ndarray: The root IDs, aligned with `supervoxel_ids`.
+        """
+        supervoxel_ids = _as_uint64(supervoxel_ids)
+        root_ids = np.zeros(len(supervoxel_ids), dtype=np.uint64)
+        nonzero = supervoxel_ids != 0
+        if not nonzero.any():
+            return root_ids
+        unique_ids, inverse = np.unique(supervoxel_ids[nonzero], return_inverse=True)
+        unique_root_ids = await self._get_roots(unique_ids, timestamp)
+        root_ids[nonzero] = unique_root_ids[inverse]
+        return root_ids
+
+    async def _get_roots(self, supervoxel_ids, timestamp):
+        # large arrays are split into chunks of at most GET_ROOTS_CHUNK_SIZE ids which
+        # are requested concurrently
+        num_chunks = max(1, -(-len(supervoxel_ids) // GET_ROOTS_CHUNK_SIZE))
+        chunks = await asyncio.gather(
+            *[
+                asyncio.to_thread(
+                    self.client.chunkedgraph.get_roots, chunk, timestamp=timestamp
+                )
+                for chunk in np.array_split(supervoxel_ids, num_chunks)
+            ]
+        )
+        return np.concatenate([_as_uint64(chunk) for chunk in chunks])
+
+    def _metadata_version(self, version_info: dict):
+        # without a version in the metadata, fall back to the client's current version so
+        # the table metadata cache is still invalidated when the version changes
+        version = version_info.get("version")
+        return self.client.materialize.version if version is None else version
+
+    async def _get_table_metadata(self, table_name: str, version=None):
+        """
+        Returns the metadata of the specified table, cached per materialization version.
+
+        Concurrent lookups of the same table share a single `get_table_metadata` request.
+        """
+        if version != self._table_metadata_version:
+            # a new version was materialized, drop the metadata of the old one
+            self._table_metadata = {}
+            self._table_metadata_version = version
+        key = (version, table_name)
+        if key in self._table_metadata:
+            return self._table_metadata[key]
+        fetch = self._table_metadata_fetches.get(key)
+        if fetch is None:
+            fetch = asyncio.ensure_future(self._fetch_table_metadata(key))
+            self._table_metadata_fetches[key] = fetch
+        # a cancelled waiter must not cancel the request the other waiters share
+        return await asyncio.shield(fetch)
+
+    async def _fetch_table_metadata(self, key: tuple):
+        version, table_name = key
+        try:
+            table_info = await asyncio.to_thread(
+                self.client.materialize.get_table_metadata, table_name, version=version
+            )
+        finally:
+            del self._table_metadata_fetches[key]
+        if version == self._table_metadata_version:
+            self._table_metadata[key] = table_info
+        return table_info
+
+    async def _get_sample_table_name(self, table_name: str, version_info: dict):
+        table_info = await self._get_table_metadata(
+            table_name, self._metadata_version(version_info)
+        )
         if not version_info["is_merged"]:
             if table_info.get("annotation_table"):
                 table_name = f"{table_name}__{self.segmentation_source}"
             else:
                 logging.debug(f"Skipping {table_name}, no segmentation data")
-        return await self.query_data_and_check_roots(async_engine, table_name)
+        return table_name
+
+    async def sample_annotations(
+        self, table_name: str, version_info: dict, async_engine=None
+    ):
+        """
+        Samples random annotations from the specified table.
+
+        Parameters:
+            table_name (str): The name of the table to sample.
+            version_info (dict): The materialization version metadata.
+            async_engine (sqlalchemy.ext.asyncio.engine.AsyncEngine, optional): The engine to
+                query with. Defaults to the instance's shared engine.
+
+        Returns:
+            tuple: The name of the queried table and the sampled columns.
+        """
+        table_name = await self._get_sample_table_name(table_name, version_info)
+        if async_engine is None:
+            async_engine = await self._get_engine()
+        return table_name, await self.query_sample(async_engine, table_name)
+
+    async def check_random_annotations(
+        self, table_name: str, version_info: dict, async_engine=None
+    ):
+        """
+        Checks the specified random annotations.
+
+        Parameters:
+            table_name (str): The name of the table to check.
+            version_info (dict): The materialization version metadata.
+            async_engine (sqlalchemy.ext.asyncio.engine.AsyncEngine, optional): The engine to
+                query with. Defaults to the instance's shared engine.
+        """
+        table_name = await self._get_sample_table_name(table_name, version_info)
+        if async_engine is None:
+            async_engine = await self._get_engine()
+        return await self.query_data_and_check_roots(
+            async_engine, table_name, timestamp=version_info.get("time_stamp")
+        )
+
+    async def _get_id_bounds(self, conn, table_name: str):
+        """
+        Returns the `(min, max)` id of the specified table, cached for `ID_BOUNDS_TTL`.
+
+        Both aggregates are answered from the primary key index. They are queried again once
+        the cached bounds expire, so rows added later are sampled too.
+        """
+        cached = self._id_bounds.get(table_name)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+        quoted_table_name = conn.dialect.identifier_preparer.quote(table_name)
+        result = await conn.execute(
+            text(f"SELECT min(id), max(id) FROM {quoted_table_name}")
+        )
+        bounds = tuple(result.fetchone())
+        self._id_bounds[table_name] = (bounds, time.monotonic() + ID_BOUNDS_TTL)
+        return bounds
+
+    async def _get_sample_columns(self, async_engine, table_name: str):
+        """
+        Returns the cached columns of the specified table needed to check root IDs.
+
+        Only `id` and the `_supervoxel_id` / `_root_id` columns are sampled, so wide
+        position, geometry and metadata columns are never pulled from the database.
+        """
+        if table_name not in self._sample_columns:
+            async with async_engine.connect() as conn:
+                columns = await conn.run_sync(
+                    lambda sync_conn: [
+                        column["name"]
+                        for column in sqlalchemy_inspect(sync_conn).get_columns(
+                            table_name
+                        )
+                    ]
+                )
+            self._sample_columns[table_name] = ["id"] + [
+                column
+                for column in columns
+                if column.endswith("_supervoxel_id") or column.endswith("_root_id")
+            ]
+        return self._sample_columns[table_name]
+
+    def _get_sample_statement(self, dialect, table_name: str, columns: list):
+        """
+        Returns the cached sample statement of the specified table.
+
+        The statement is built once per table with quoted identifiers and typed bind
+        parameters, so the compiled statement and asyncpg's prepared statement are reused
+        across cycles.
+        """
+        key = (table_name, self.use_tsm_system_rows_extension)
+        if key not in self._sample_statements:
+            preparer = dialect.identifier_preparer
+            quoted_table_name = preparer.quote(table_name)
+            quoted_columns = ", ".join(preparer.quote(column) for column in columns)
+            if self.use_tsm_system_rows_extension:
+                statement = text(
+                    f"SELECT {quoted_columns} FROM {quoted_table_name} TABLESAMPLE SYSTEM_ROWS(:num_rows)"
+                ).bindparams(bindparam("num_rows", type_=Integer))
+            else:
+                statement = text(
+                    f"SELECT {quoted_columns} FROM {quoted_table_name} WHERE id IN :ids LIMIT :num_rows"
+                ).bindparams(
+                    bindparam("ids", type_=BigInteger, expanding=True),
+                    bindparam("num_rows", type_=Integer),
+                )
+            self._sample_statements[key] = statement
+        return self._sample_statements[key]
+
+    async def query_sample(self, async_engine, table_name: str):
+        """
+        Queries a random sample of rows from the specified table.
+
+        Rows are sampled with `TABLESAMPLE SYSTEM_ROWS` when the `tsm_system_rows` extension
+        is available, otherwise by looking up random ids between the table's min and max id
+        through the primary key. Either way the cost scales with the sample size rather than
+        the table size.
+
+        Parameters:
+            async_engine (sqlalchemy.ext.asyncio.engine.AsyncEngine): The async engine to use.
+            table_name (str): The name of the table to use.
+
+        Returns:
+            dict: The sampled `id`, `_supervoxel_id` and `_root_id` columns as NumPy arrays.
+        """
+        columns = await self._get_sample_columns(async_engine, table_name)
+        if not _supervoxel_root_pairs(tuple(columns)):
+            # reference tables without segmentation have nothing to check
+            logging.debug(f"Skipping {table_name}, no supervoxel columns")
+            return _rows_to_arrays(columns, [])
+
+        async with async_engine.connect() as conn:
+            # a single read-only statement needs no BEGIN/COMMIT round trips
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            sample_query = self._get_sample_statement(conn.dialect, table_name, columns)
+            parameters = {"num_rows": self.num_test_annotations}
+            if not self.use_tsm_system_rows_extension:
+                min_id, max_id = await self._get_id_bounds(conn, table_name)
+                if min_id is None:
+                    return _rows_to_arrays(columns, [])
+                num_ids = min(
+                    max_id - min_id + 1,
+                    self.num_test_annotations * ID_SAMPLE_OVERSAMPLING,
+                )
+                parameters["ids"] = random.sample(range(min_id, max_id + 1), num_ids)
+            result = await conn.execute(sample_query, parameters)
+            rows = result.fetchall()
+        logging.debug(f"TABLE NAME: {table_name}")
+        logging.debug(f"USING SYSTEM_ROWS:{self.use_tsm_system_rows_extension}")
+        return _rows_to_arrays(columns, rows)
 
     async def query_data_and_check_roots(
         self,
         async_engine,
         table_name: str,
-        sample_percent: int = 10,
+        timestamp=None,
     ):
         """
         Queries the specified data and checks the roots.
@@ -167,122 +821,196 @@ class Canary:
         Parameters:
             async_engine (sqlalchemy.ext.asyncio.engine.AsyncEngine): The async engine to use.
             table_name (str): The name of the table to use.
-            sample_percent (int, optional): The percentage to sample. Defaults to `10`.
+            timestamp (datetime.datetime, optional): The root ID lookup timestamp. Defaults to
+                the materialization version's timestamp.
 
         Returns:
             bool: `True` if an error was found; `False` otherwise.
         """
-        async with async_engine.begin() as conn:
-            sample_query = (
-                f"SELECT * FROM {table_name} TABLESAMPLE SYSTEM_ROWS({self.num_test_annotations})"
-                if self.use_tsm_system_rows_extension
-                else f"SELECT * FROM {table_name} TABLESAMPLE system ({sample_percent}) WHERE random()<0.01 LIMIT {self.num_test_annotations}"
-            )
-            try:
-                result = await conn.execute(text(sample_query))
-            except Exception as e:
-                raise (e)
-
-            df = pd.DataFrame(result)
-
-            if not df.empty:
-                has_error = self.check_root_ids(df, table_name)
-                logging.debug(f"TABLE NAME: {table_name}")
-                logging.debug(f"USING SYSTEM_ROWS:{self.use_tsm_system_rows_extension}")
-                logging.debug(df.id.describe())
-                logging.debug(f"ERROR FOUND? {has_error}")
-            else:
-                has_error = False
-        # close database connection
-        await async_engine.dispose()
+        sample = await self.query_sample(async_engine, table_name)
+        has_error = await self._check_sample(table_name, sample, timestamp)
+        logging.debug(f"ERROR FOUND? {has_error}")
         return has_error
 
-    def check_root_ids(self, df, table_name: str):
+    def check_root_ids(self, df, table_name: str, timestamp=None, root_ids=None):
         """
         Checks the root IDs in the specified DataFrame.
 
+        Must not be called from a running event loop when `root_ids` is not given, as the root
+        IDs are then looked up with `lookup_root_ids` in a loop of their own.
+
         Parameters:
-            df (pandas.DataFrame): The DataFrame to use.
+            df (pandas.DataFrame or dict): The DataFrame, or a dict of column name to array.
+            table_name (str): The name of the table the rows were sampled from.
+            timestamp (datetime.datetime, optional): The root ID lookup timestamp. Defaults to
+                the materialization version's timestamp.
+            root_ids (numpy.ndarray, optional): The root IDs of the supervoxel columns,
+                concatenated in column order. Defaults to looking them up.
 
         Returns:
             bool: `True` if an error was found; `False` otherwise.
         """
-        supervoxel_columns = [
-            col for col in df.columns if col.endswith("_supervoxel_id")
-        ]
-        root_id_columns = [col for col in df.columns if col.endswith("_root_id")]
-        errors_found = False
-        for supervoxel_col in supervoxel_columns:
-            prefix = supervoxel_col[: -len("_supervoxel_id")]
-            root_id_col = f"{prefix}_root_id"
-
-            if root_id_col not in root_id_columns:
-                continue
-
+        if root_ids is None:
+            supervoxel_ids = _sample_supervoxel_ids(df)
+            if supervoxel_ids is None:
+                return False
             try:
-                timestamp = self.client.materialize.get_version_metadata()["time_stamp"]
-                root_ids = self.client.chunkedgraph.get_roots(
-                    df[supervoxel_col].values,
-                    timestamp=timestamp,
-                )
+                if timestamp is None:
+                    version_info = self.client.materialize.get_version_metadata()
+                    timestamp = version_info["time_stamp"]
+                root_ids = asyncio.run(self.lookup_root_ids(supervoxel_ids, timestamp))
             except Exception as e:
                 self.send_slack_notification(f"Error in get_roots: {e}")
                 logging.error(e)
-                continue
+                return False
+        return self._compare_root_ids(df, table_name, root_ids, timestamp)
 
-            mismatch = df[root_id_col].values != root_ids
+    def _compare_root_ids(self, df, table_name: str, root_ids, timestamp):
+        """
+        Compares the root IDs in the specified DataFrame against looked up root IDs.
 
-            if mismatch.any():
-                bad_root_id_rows = df[mismatch]
-                chunkgraph_root_id_values = root_ids[mismatch]
-                formatted_bad_db_rows = bad_root_id_rows[["id", root_id_col]]
-                mismatch_message = f"MISMATCHED DB ROWS:\n{formatted_bad_db_rows}\nVALID CHUNKGRAPH VALUES:\n{chunkgraph_root_id_values}"
-                logging.debug(mismatch_message)
+        Every root ID column is compared against the chunkedgraph root IDs of its supervoxel
+        column in one vectorized pass, and each mismatch is reported to Slack.
+        """
+        pairs = _supervoxel_root_pairs(tuple(df))
+        if not pairs:
+            return False
 
-                slack_block_msg = [
-                    {
-                        "type": "section",
-                        "text": {"type": "mrkdwn", "text": "Mismatch Found"},
-                    },
-                    {"type": "divider"},
-                    {
-                        "type": "section",
-                        "text": {
-                            "type": "mrkdwn",
-                            "text": f">Database: {self.database_uri.database} \n>Table: {table_name}\n>Lookup timestamp: {str(timestamp)}",
-                        },
+        db_root_ids = np.stack([_as_uint64(df[root_col]) for _, root_col in pairs])
+        root_ids = _as_uint64(root_ids).reshape(db_root_ids.shape)
+        mismatch = np.not_equal(db_root_ids, root_ids)
+
+        # a DataFrame column is only converted to an array once
+        ids = np.asarray(df["id"])
+        errors_found = False
+        for pair_index in np.flatnonzero(mismatch.any(axis=1)):
+            root_id_col = pairs[pair_index][1]
+            bad_rows = np.flatnonzero(mismatch[pair_index])
+            chunkgraph_root_id_values = root_ids[pair_index, bad_rows]
+            formatted_bad_db_rows = pd.DataFrame(
+                {
+                    "id": ids[bad_rows],
+                    root_id_col: db_root_ids[pair_index, bad_rows],
+                },
+                index=bad_rows,
+            )
+            mismatch_message = f"MISMATCHED DB ROWS:\n{formatted_bad_db_rows}\nVALID CHUNKGRAPH VALUES:\n{chunkgraph_root_id_values}"
+            logging.debug(mismatch_message)
+
+            slack_block_msg = [
+                {
+                    "type": "section",
+                    "text": {"type": "mrkdwn", "text": "Mismatch Found"},
+                },
+                {"type": "divider"},
+                {
+                    "type": "section",
+                    "text": {
+                        "type": "mrkdwn",
+                        "text": f">Database: {self.database_uri.database} \n>Table: {table_name}\n>Lookup timestamp: {str(timestamp)}",
                     },
-                    {"type": "divider"},
-                    {
-                        "type": "section",
-                        "text": {
-                            "type": "mrkdwn",
-                            "text": mismatch_message,
-                        },
+                },
+                {"type": "divider"},
+                {
+                    "type": "section",
+                    "text": {
+                        "type": "mrkdwn",
+                        "text": mismatch_message,
                     },
-                ]
+                },
+            ]
 
-                self.send_slack_notification(message=None, blocks=slack_block_msg)
-                errors_found = True
+            self.send_slack_notification(message=None, blocks=slack_block_msg)
+            errors_found = True
         return errors_found
 
+    def _start_slack_worker(self):
+        """
+        Starts the background task that drains queued Slack notifications.
+        """
+        slack_client = self.slack_client
+        if isinstance(slack_client, AsyncWebClient) and slack_client.session is None:
+            # share one keep-alive HTTPS connection pool for all posts during the run
+            self._slack_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=4, ttl_dns_cache=300, keepalive_timeout=60
+                )
+            )
+            slack_client.session = self._slack_session
+        self._slack_queue = asyncio.Queue()
+        self._slack_worker = asyncio.get_running_loop().create_task(self._drain_slack())
+
+    async def _stop_slack_worker(self):
+        """
+        Flushes any queued Slack notifications and stops the background task.
+        """
+        if self._slack_worker is None:
+            return
+        if not self._slack_worker.done():
+            await self._slack_queue.join()
+        self._slack_worker.cancel()
+        try:
+            await self._slack_worker
+        except asyncio.CancelledError:
+            pass
+        self._slack_queue = None
+        self._slack_worker = None
+        if self._slack_session is not None:
+            # the session is bound to this event loop
+            await self._slack_session.close()
+            self.slack_client.session = None
+            self._slack_session = None
+
+    async def _drain_slack(self):
+        """
+        Posts queued Slack notifications one at a time, at most one per `SLACK_MESSAGE_INTERVAL`.
+        """
+        while True:
+            message = await self._slack_queue.get()
+            try:
+                await self._post_slack_message(**message)
+            finally:
+                self._slack_queue.task_done()
+            await asyncio.sleep(SLACK_MESSAGE_INTERVAL)
+
+    async def _post_slack_message(self, message=None, blocks=None):
+        try:
+            response = self.slack_client.chat_postMessage(
+                channel=self.slack_channel, text=message, blocks=blocks
+            )
+            if inspect.isawaitable(response):
+                await response
+        except Exception:
+            # API, connection and timeout errors must not stop the notification worker
+            logging.exception("Error sending Slack message")
+
     def send_slack_notification(self, message=None, blocks=None):
         """
         Sends a Slack notification with the specified message.
 
+        While `run` is active the notification is queued and posted by a background task so
+        the check loop is not blocked on the Slack API; otherwise it is posted immediately.
+
         Parameters:
             message (str): The message to send.
+            blocks (list, optional): Slack blocks to send. Defaults to `None`.
         """
+        if self._slack_worker is not None and not self._slack_worker.done():
+            self._slack_queue.put_nowait({"message": message, "blocks": blocks})
+            return
         try:
-            self.slack_client.chat_postMessage(
-                channel=self.slack_channel, text=message, blocks=blocks
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(self._post_slack_message(message=message, blocks=blocks))
+        else:
+            task = loop.create_task(
+                self._post_slack_message(message=message, blocks=blocks)
             )
-        except SlackApiError as e:
-            logging.error(f"Error sending Slack message: {e}")
+            # keep a reference so the task is not garbage collected before it finishes
+            self._slack_posts.add(task)
+            task.add_done_callback(self._slack_posts.discard)
 
 
 if __name__ == "__main__":
     canary = Canary()
-    loop = asyncio.new_event_loop()
-    asyncio.get_event_loop().run_until_complete(canary.run())
-    loop.close()
+    asyncio.run(canary.run())
@@ -1,41 +1,49 @@
-import threading
 import asyncio
+import contextlib
 import logging
 
-from flask import Flask
+from aiohttp import web
 from canary import Canary
 
 logging.basicConfig(level=logging.INFO)
 
-app = Flask(__name__)
-canary_thread_exception = threading.Event()
+canary_task_key = web.AppKey("canary_task", asyncio.Task)
 
 
-def run_canary():
+async def run_canary():
+    canary = None
     try:
         logging.info("Starting...")
-        canary = Canary()
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        asyncio.get_event_loop().run_until_complete(canary.run())
+        # CAVEclient setup is blocking, keep the health endpoint responsive meanwhile
+        canary = await asyncio.to_thread(Canary)
+        await canary.run()
     except Exception as e:
-        canary.send_slack_notification(f"Canary thread crashed with exception: {e}")
-        logging.error(f"Canary thread crashed with exception: {e}")
-        canary_thread_exception.set()
+        if canary is not None:
+            canary.send_slack_notification(f"Canary crashed with exception: {e}")
+        logging.error(f"Canary crashed with exception: {e}")
 
 
-@app.route("/health")
-def health_check():
-    if canary_thread_exception.is_set():
-        return "Canary thread crashed", 500
-    return "OK", 200
+async def canary_context(app):
+    # the canary runs on the same event loop as the health endpoint
+    app[canary_task_key] = asyncio.create_task(run_canary())
+    yield
+    app[canary_task_key].cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await app[canary_task_key]
+
+
+async def health_check(request):
+    if request.app[canary_task_key].done():
+        return web.Response(text="Canary crashed", status=500)
+    return web.Response(text="OK", status=200)
 
 
 def main():
-    canary_thread = threading.Thread(target=run_canary)
-    canary_thread.start()
+    app = web.Application()
+    app.router.add_get("/health", health_check)
+    app.cleanup_ctx.append(canary_context)
 
-    app.run(host="0.0.0.0", port=80)
+    web.run_app(app, host="0.0.0.0", port=80)
 
 
 if __name__ == "__main__":